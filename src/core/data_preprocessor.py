@@ -16,6 +16,7 @@ It includes functionality for:
 """
 import json
 from src.datasketch_custom_implementation import datasketch
+from src.core.product_table import ProductTable
 from tomlkit import load as toml_load
 import re
 import logging
@@ -24,15 +25,22 @@ import numpy as np
 import pandas as pd
 from scipy.sparse import lil_matrix
 import matplotlib.pyplot as plt
-import uuid
-from collections import defaultdict
 from itertools import combinations
+from collections import defaultdict
 
 log_format = "%(levelname)s %(asctime)s - %(message)s"
 
 logging.basicConfig(stream=sys.stdout, filemode="w", format=log_format, level=logging.INFO)
 logger = logging.getLogger("minhash")
 
+# Regex patterns for model words, compiled once at import. The patterns have no capture groups,
+# so findall returns the whole matches directly.
+# words in the title that contain both letters and numbers
+TITLE_RE = re.compile(r"[a-zA-Z0-9]*(?:[0-9]+[^0-9, ]+|[^0-9, ]+[0-9]+)[a-zA-Z0-9]*")
+# feature values that are a number with an optional unit; multiline so all values can be matched in one sweep
+KVP_RE = re.compile(r"^\d+(?:\.\d+)?[a-zA-Z]*$", re.MULTILINE)
+LETTERS_RE = re.compile(r"[a-zA-Z]+")
+
 
 def load_data(file_loc):
     """
@@ -51,10 +59,10 @@ def load_data(file_loc):
 
 def transform_data(data):
     """
-    Transform product data by adding UUIDs and creating both list and dictionary outputs.
+    Transform product data by adding IDs and creating both list and dictionary outputs.
 
     This function processes the input data by:
-    1. Generating unique IDs for each product
+    1. Assigning a sequential integer ID to each product
     2. Creating a list representation for iteration
     3. Creating a dictionary representation for quick lookups
 
@@ -62,14 +70,14 @@ def transform_data(data):
         data (dict): Input data with model IDs as keys and product lists as values
 
     Returns:
-        tuple: (list of products, dictionary of products by UUID)
+        tuple: (list of products, dictionary of products by ID)
     """
     list_output = []
     dict_output = {}
     for model_id in data:
         for product in data[model_id]:
-            # generate uuid
-            unique_id = uuid.uuid4()
+            # sequential integer ids are unique within the data set and cheap to hash
+            unique_id = len(list_output)
             product["uuid"] = unique_id
             list_output.append(product)
             dict_output[unique_id] = product
@@ -84,41 +92,52 @@ def clean_data(data, matches):
     a dictionary of correct forms and their alternatives.
 
     Args:
-        data (dict): Dictionary of products indexed by UUID
+        data (dict): Dictionary of products indexed by ID
         matches (dict): Dictionary mapping correct forms to lists of alternatives
 
     Returns:
-        dict: Cleaned product data
+        dict: Cleaned product data, the products are cleaned in place
     """
     logger.info("cleaning data inputs")
-    return_dict = {}
-    for uuid, product in data.items():
+    # flatten the matches once, keeping the order in which the replacements are applied
+    replacements = [(alternative, correct_form) for correct_form in matches for alternative in matches[correct_form]]
+    # The title and all feature values of a product are cleaned as one string, joined by a separator that
+    # none of the replacements contain. A replacement can then never match across two fields, so this gives
+    # the same result as cleaning every field separately, with one str.replace per replacement per product.
+    separator = "\x00"
+    joinable = not any(separator in alternative + correct_form for alternative, correct_form in replacements)
+    for product in data.values():
+        features_map = product["featuresMap"]
+        fields = [product["title"], *features_map.values()]
+        text = separator.join(fields)
+        if joinable and text.count(separator) == len(fields) - 1:
+            cleaned_fields = _replace_all(text, replacements).split(separator)
+        else:
+            cleaned_fields = [_replace_all(field, replacements) for field in fields]
+
         # clean titles
-        for correct_form in matches:
-            for alternative in matches[correct_form]:
-                product["title"] = product["title"].replace(alternative, correct_form)
+        product["title"] = cleaned_fields[0]
 
         # clean feature maps
-        for feature, value in product["featuresMap"].items():
-            for correct_form in matches:
-                for alternative in matches[correct_form]:
-                    product["featuresMap"][feature] = product["featuresMap"][feature].replace(alternative, correct_form)
-        return_dict[uuid] = product
-    return return_dict
+        for feature, value in zip(features_map, cleaned_fields[1:]):
+            features_map[feature] = value
+    return data
 
 
-def tuple_model_words_to_list(model_words_regex_result):
+def _replace_all(text, replacements):
     """
-    Convert regex match tuples to list of model words.
+    Apply (alternative, correct form) replacements to a string, in order.
 
     Args:
-        model_words_regex_result (list): List of regex match tuples
+        text (str): String to clean
+        replacements (list): List of (alternative, correct form) tuples
 
     Returns:
-        list: Extracted model words
+        str: Cleaned string
     """
-    result = [x[0] for x in model_words_regex_result]
-    return result
+    for alternative, correct_form in replacements:
+        text = text.replace(alternative, correct_form)
+    return text
 
 
 def extract_model_words(data):
@@ -134,32 +153,35 @@ def extract_model_words(data):
         data (dict): Dictionary of products
 
     Returns:
-        dict: Products with added model_words sets
+        dict: Products with added model_words frozensets, products that fail are removed
     """
     logger.info("extracting model words using regex expressions")
+    # many model words occur in several products, share a single string object per model word
+    interned_words = {}
     # Find all model words
-    regex_title = re.compile(r"([a-zA-Z0-9]*(([0-9]+[^0-9, ]+)|([^0-9, ]+[0-9]+))[a-zA-Z0-9]*)")
-    regex_KVP = re.compile(r"(^\d+(\.\d+)?[a-zA-Z]+$|^\d+(\.\d+)?$)")
-    return_dict = {}
+    failed_uuids = []
     for uuid, product in data.items():
         try:
             model_id = product["modelID"]
-            model_words = tuple_model_words_to_list(regex_title.findall(product["title"]))
-            for key, value in product["featuresMap"].items():
-                model_words_values = tuple_model_words_to_list(regex_KVP.findall(value))
+            model_words = TITLE_RE.findall(product["title"])
+            # match all feature values at once, one value per line (feature values contain no line breaks)
+            model_words_values = KVP_RE.findall("\n".join(product["featuresMap"].values()))
 
-                # Extract non-numerical part of model word
-                model_words_numerical = [re.sub(pattern=r"[a-zA-Z]+", repl="", string=x) for x in model_words_values]
+            # Extract non-numerical part of model word
+            model_words_numerical = [LETTERS_RE.sub("", x) for x in model_words_values]
 
-                model_words.extend(model_words_numerical)
+            model_words.extend(model_words_numerical)
 
-            model_words_filtered = [mw for mw in model_words if mw != model_id]
-            product["model_words"] = set(model_words_filtered)
-            return_dict[uuid] = product
+            product["model_words"] = frozenset(
+                interned_words.setdefault(mw, mw) for mw in model_words if mw != model_id
+            )
         except Exception as e:
             print(f"exception: {e}")
-            print(regex_title.findall(product["title"]))
-    return return_dict
+            print(TITLE_RE.findall(product["title"]))
+            failed_uuids.append(uuid)
+    for uuid in failed_uuids:
+        del data[uuid]
+    return data
 
 
 def extract_tv_brands(data, tv_brands):
@@ -184,48 +206,46 @@ def extract_tv_brands(data, tv_brands):
     title_no_brands = {}
     brands_in_data = {}
     dict_to_return = {}
+    # Compile all brands into a single pattern, so that every title is scanned once instead of once per brand.
+    # The lookahead reports a match at every position of the title. Per position the alternation picks the first
+    # matching brand in the list, so the brand that comes first in tv_brands wins. Both sides are lowercased.
+    # Regex covers both cases where it is actually part of a longer word and when there is not a space after the brand
+    title_brands = [brand for brand in tv_brands if "(" not in brand and ")" not in brand]
+    title_brand_rank = {}
+    for rank, brand in enumerate(title_brands):
+        title_brand_rank.setdefault(brand.lower(), rank)
+    title_pattern = re.compile(r"(?=\b(" + "|".join(re.escape(brand.lower()) for brand in title_brands) + r")\b)")
+    brands_lower = [(brand, brand.lower()) for brand in tv_brands]
     for uuid, product in data.items():
         # first check title
-        for brand in tv_brands:
-            brand_lower = brand.lower()
-            # Regex covers both cases where it is actually part of a longer word and when there is not a space after the brand
-            if (
-                "(" not in brand
-                and ")" not in brand
-                and re.search(rf"\b({brand_lower})\b", product["title"].lower(), re.IGNORECASE)
-            ):
-                # if brand.lower() in product['title'].lower():
-                product["brand"] = str(brand)
-                count += 1
-                if brand not in brands_in_data:
-                    brands_in_data[brand] = 1
-                else:
-                    brands_in_data[brand] += 1
-                break
+        brand = None
+        title_matches = [title_brand_rank[match.group(1)] for match in title_pattern.finditer(product["title"].lower())]
+        if title_matches:
+            brand = title_brands[min(title_matches)]
         else:
-            for brand in tv_brands:
-                # check key-value pairs
-                for key, value in product["featuresMap"].items():
-                    if brand.lower() in value.lower():
-                        product["brand"] = str(brand)
-                        count += 1
-                        if brand not in brands_in_data:
-                            brands_in_data[brand] = 1
-                        else:
-                            brands_in_data[brand] += 1
-                        break
-                else:
-                    continue
-                break
+            # check key-value pairs, brand names contain no line breaks so they cannot match across values
+            values_lower = "\n".join(product["featuresMap"].values()).lower()
+            brand = next((brand for brand, brand_lower in brands_lower if brand_lower in values_lower), None)
+        if brand is not None:
+            product["brand"] = str(brand)
+            count += 1
+            if brand not in brands_in_data:
+                brands_in_data[brand] = 1
             else:
-                product["brand"] = "Unknown"
-                title_no_brands[product["title"]] = product["featuresMap"]
+                brands_in_data[brand] += 1
+        else:
+            product["brand"] = "Unknown"
+            title_no_brands[product["title"]] = product["featuresMap"]
         dict_to_return[uuid] = product
+    # misidentified pairs share a model ID, so only products within the same model ID group are compared
+    products_by_model_id = defaultdict(list)
+    for product in data.values():
+        products_by_model_id[product["modelID"]].append(product)
     misidentified = [
         (str(product_x["brand"]), str(product_y["brand"]), product_x, product_y)
-        for uuid, product_x in data.items()
-        for uuid, product_y in data.items()
-        if product_x["brand"] != product_y["brand"] and product_x["modelID"] == product_y["modelID"]
+        for product_x in data.values()
+        for product_y in products_by_model_id[product_x["modelID"]]
+        if product_x["brand"] != product_y["brand"]
     ]
     logger.info("identified {}% of brands".format(str(count / total_products * 100)))
     return data, title_no_brands, brands_in_data, misidentified
@@ -233,21 +253,20 @@ def extract_tv_brands(data, tv_brands):
 
 def get_model_id_to_uuid(data):
     """
-    Create mapping from model IDs to product UUIDs.
+    Create mapping from model IDs to product IDs.
 
     Args:
         data (list): List of products
 
     Returns:
-        defaultdict: Dictionary mapping model IDs to sets of product UUIDs
+        pandas.Series: Series indexed by model ID, holding the list of product IDs per model ID
     """
-    duplicates_dict = defaultdict(set)
-    for product in data:
-        duplicates_dict[product["modelID"]].add(product["uuid"])
-    return duplicates_dict
+    df_products = pd.DataFrame([(product["modelID"], product["uuid"]) for product in data], columns=["modelID", "uuid"])
+    duplicates_series = df_products.groupby("modelID", sort=False)["uuid"].apply(list)
+    return duplicates_series
 
 
-def data_cleaning_pipeline(file_loc):
+def data_cleaning_pipeline(file_loc, return_product_table=False):
     """
     Complete data preprocessing pipeline.
 
@@ -261,9 +280,12 @@ def data_cleaning_pipeline(file_loc):
 
     Args:
         file_loc (str): Path to input JSON file
+        return_product_table (bool, optional): Whether to also return the ProductTable with the
+            factorized modelID, brand and shop of the products. Defaults to False.
 
     Returns:
-        tuple: (preprocessed product data, list of duplicate pairs)
+        tuple: (preprocessed product data, set of duplicate pairs as frozensets),
+            followed by the ProductTable if return_product_table is True
     """
     data = load_data(file_loc)
 
@@ -275,17 +297,10 @@ def data_cleaning_pipeline(file_loc):
 
     # extract duplicates
     model_id_to_uuid = get_model_id_to_uuid(data_transformed)
-    model_id_to_uuid_duplicates = {x: model_id_to_uuid[x] for x in model_id_to_uuid if len(model_id_to_uuid[x]) > 1}
-    duplicates = [model_id_to_uuid[x] for x in model_id_to_uuid_duplicates]
-    duplicates_summary = {2: 0, 3: 0, 4: 0}
-    for el in duplicates:
-        duplicates_summary[len(el)] += 1
-    duplicates_no_triples_quadruples = []
-    for el in duplicates:
-        if len(el) == 2:
-            duplicates_no_triples_quadruples.append(el)
-        else:
-            duplicates_no_triples_quadruples.extend([set(x) for x in combinations(el, r=2)])
+    duplicates = model_id_to_uuid[model_id_to_uuid.str.len() > 1]
+    duplicates_summary = duplicates.str.len().value_counts().sort_index().to_dict()
+    # set of frozensets, so that checking whether a candidate pair is a duplicate is O(1)
+    duplicates_no_triples_quadruples = {frozenset(x) for el in duplicates for x in combinations(el, r=2)}
 
     # data cleaning
     data_cleaned = clean_data(data=dict_data_transformed, matches=config["datacleaning"])
@@ -297,4 +312,8 @@ def data_cleaning_pipeline(file_loc):
 
     # extract model words
     data_with_model_words = extract_model_words(data_with_tv_brands)
+    if return_product_table:
+        # factorize once, so later stages can compare products on integer codes
+        product_table = ProductTable.from_data(data_with_model_words)
+        return data_with_model_words, duplicates_no_triples_quadruples, product_table
     return data_with_model_words, duplicates_no_triples_quadruples
\ No newline at end of file
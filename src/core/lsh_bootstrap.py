@@ -43,7 +43,9 @@ def bootstrap(num_perm, iterations, sample_ratio=2 / 3):
 
     seeds_bootstrap = seed_gen.get_batch_of_seeds(no_seeds=num_perm)
     # extract model words
-    data_with_model_words, duplicates_pairs = data_cleaning_pipeline(file_loc)
+    data_with_model_words, duplicates_pairs, product_table_all = data_cleaning_pipeline(
+        file_loc, return_product_table=True
+    )
     list_df = []
     for iter_num in tqdm(iterable=range(iterations), desc="Bootstrap process"):
 
@@ -55,16 +57,17 @@ def bootstrap(num_perm, iterations, sample_ratio=2 / 3):
             a=len(data_with_model_words), size=int(sample_ratio * len(data_with_model_words)), replace=False
         )
         uuids = [uuid for uuid, value in data_with_model_words.items()]
-        sampled_uuids = [uuid for index, uuid in enumerate(uuids) if index in list(indices)]
+        sampled_indices = set(indices.tolist())
+        sampled_uuids = {uuid for index, uuid in enumerate(uuids) if index in sampled_indices}
         data_sampled = {key: value for key, value in data_with_model_words.items() if key in sampled_uuids}
 
         # filter duplicates set
-        duplicates_sampled = [
-            x for x in duplicates_pairs if (list(x)[0] in sampled_uuids) and (list(x)[1] in sampled_uuids)
-        ]
+        duplicates_sampled = {x for x in duplicates_pairs if x <= sampled_uuids}
 
         # add sketches
         data_with_sketches = add_sketches(data_sampled, seed_gen=seed_gen, num_perm=num_perm, mixed_tab=True)
+        # data_sampled keeps the order of the full data, so take the sampled indices in sorted order
+        product_table = product_table_all.take(np.sort(indices))
 
         # retrieve parameters
         with open("./results/parameter_config.json", "r") as file_:
@@ -86,11 +89,15 @@ def bootstrap(num_perm, iterations, sample_ratio=2 / 3):
                         parameter_config_list=parameter_config_list,
                     )
                     candidate_pairs_filtered = filter_candidate_pairs_brands_and_shops(
-                        candidate_pairs=candidate_pairs, data_with_sketches=data_with_sketches
+                        candidate_pairs=candidate_pairs,
+                        data_with_sketches=data_with_sketches,
+                        product_table=product_table,
                     )
                     dict_ = {}
                     duplicates_found = get_duplicates_found_pairwise(candidate_pairs, duplicates_sampled)
-                    pair_quality = get_pair_quality(candidate_pairs=candidate_pairs_filtered, data=data_with_sketches)
+                    pair_quality = get_pair_quality(
+                        candidate_pairs=candidate_pairs_filtered, data=data_with_sketches, product_table=product_table
+                    )
                     pair_completeness = len(duplicates_found) / len(duplicates_sampled) * 100
                     dict_["threshold"] = threshold
                     dict_["pair_quality"] = pair_quality
@@ -101,7 +108,7 @@ def bootstrap(num_perm, iterations, sample_ratio=2 / 3):
                     dict_["iter_num"] = iter_num
                     dict_["time_taken"] = perf_counter() - start_time
                     list_metrics.append(dict_)
-        no_possible_comparisons = get_total_possible_comparisions(data_sampled)
+        no_possible_comparisons = get_total_possible_comparisions(data_sampled, product_table=product_table)
         df_results = pd.DataFrame(list_metrics)
         df_results["reduction_ratio"] = df_results["no_candidate_pairs"].apply(
             lambda x: (no_possible_comparisons - x) / no_possible_comparisons
@@ -20,8 +20,11 @@ Functions:
 
 """
 from src.datasketch_custom_implementation import datasketch
-import copy
-from optimize_parameters import compute_weighted_average_error
+from src.datasketch_custom_implementation.datasketch.hashfunc import sha1_hash32
+from src.core.product_table import ProductTable
+from optimize_parameters import compute_weighted_average_errors
+import functools
+import numpy as np
 import pandas as pd
 
 
@@ -38,39 +41,37 @@ def add_sketches(data, seed_gen, num_perm=256, mixed_tab=False):
     Returns:
         dict: Products with added MinHash and FSS sketches
     """
-    return_dict = dict()
-    # generate MinHash
-    count = 0
     # generate mixedtab_objects
     # mixedtab_objects = datasketch.FillSketch.create_mixedtab_objects(sketch_length=num_perm, seed_gen=seed_gen)
     seed_minhash = seed_gen.get_single_seed()
     seed_mixed_tab_1 = seed_gen.get_single_seed()
     seed_mixed_tab_2 = seed_gen.get_single_seed()
     seeds_mixedtab = [seed_mixed_tab_1, seed_mixed_tab_2]
-    for uuid, product in data.items():
-        # minhash
-        minhash = datasketch.MinHash(num_perm=num_perm, seed=seed_minhash)
-        for model_word in product["model_words"]:
-            minhash.update(model_word.encode("utf-8"))
-        product["minhash"] = minhash
-
-        # fill sketch
-        # mixedtab_objects = mixedtab_objects if mixed_tab else None
 
-        fill_sketch = datasketch.FillSketch(
-            input=product["model_words"], seeds=seeds_mixedtab, sketch_length=num_perm, mixed_tab=True
-        )
+    # generate in bulk, so the hashing state is initialized once and shared between products
+    # model words repeat across products, so every model word is encoded and hashed only once
+    encoded_words = {y: y.encode("utf-8") for product in data.values() for y in product["model_words"]}
+    data_only_model_words = [[encoded_words[y] for y in product["model_words"]] for product in data.values()]
+    minhashes = datasketch.MinHash.bulk(
+        data_only_model_words,
+        num_perm=num_perm,
+        seed=seed_minhash,
+        hashfunc=functools.lru_cache(maxsize=None)(sha1_hash32),
+    )
+    fill_sketches = datasketch.FillSketch.bulk(
+        [product["model_words"] for product in data.values()],
+        seeds=seeds_mixedtab,
+        sketch_length=num_perm,
+        mixed_tab=True,
+    )
+    for product, minhash, fill_sketch in zip(data.values(), minhashes, fill_sketches):
+        product["minhash"] = minhash
         product["fss"] = fill_sketch
-        return_dict[uuid] = product
-        count += 1
 
-    # generate in bulk
-    # data_only_model_words = [[y.encode('utf-8') for y in product['model_words']] for uuid, product in data.items()]
-    # minhashes = datasketch.MinHash.bulk(data_only_model_words, num_perm=num_perm, seed=1)
+    return data
 
-    return return_dict
 
-def get_pair_quality(candidate_pairs, data):
+def get_pair_quality(candidate_pairs, data, product_table=None):
     """
     Calculate the pair quality metric for candidate pairs.
     
@@ -79,20 +80,17 @@ def get_pair_quality(candidate_pairs, data):
     Args:
         candidate_pairs (set): Set of candidate duplicate pairs
         data (dict): Dictionary of product data
+        product_table (ProductTable, optional): Columnar view on data. Created from data if not given.
 
     Returns:
         float: Pair quality percentage (0-100)
     """
-    duplicates = []
-
-    for cp in candidate_pairs:
-        list_cp = list(cp)
-        product_1 = data[list_cp[0]]
-        product_2 = data[list_cp[1]]
-        if product_1["modelID"] == product_2["modelID"]:
-            duplicates.append(cp)
+    product_table = ProductTable.from_data(data) if product_table is None else product_table
+    model_ids = product_table.model_ids
+    pairs = product_table.pairs_to_array(candidate_pairs)
+    duplicates = np.count_nonzero(model_ids[pairs[:, 0]] == model_ids[pairs[:, 1]])
     try:
-        pair_quality = len(duplicates) / len(candidate_pairs) * 100
+        pair_quality = duplicates / len(candidate_pairs) * 100
     except ZeroDivisionError:
         pair_quality = 0
     return pair_quality
@@ -137,7 +135,7 @@ def apply_lsh_generate_candidate_pairs(
     return lsh.get_candidate_pairs()
 
 
-def filter_candidate_pairs_brands_and_shops(candidate_pairs, data_with_sketches):
+def filter_candidate_pairs_brands_and_shops(candidate_pairs, data_with_sketches, product_table=None):
     """
     Filter candidate pairs based on brand and shop criteria.
     
@@ -146,20 +144,18 @@ def filter_candidate_pairs_brands_and_shops(candidate_pairs, data_with_sketches)
     Args:
         candidate_pairs (set): Set of candidate pairs
         data_with_sketches (dict): Product data with sketches
+        product_table (ProductTable, optional): Columnar view on data. Created from data if not given.
 
     Returns:
         set: Filtered set of candidate pairs
     """
+    product_table = ProductTable.from_data(data_with_sketches) if product_table is None else product_table
     # for each candidate pair, check whether they have the same brand and are from different shops
-    output_set = set()
-    for cp in candidate_pairs:
-        list_cp = list(cp)
-        product_1 = data_with_sketches[list_cp[0]]
-        product_2 = data_with_sketches[list_cp[1]]
-        if product_1["brand"] == product_2["brand"] and product_1["shop"] != product_2["shop"]:
-            output_set.add(cp)
-        else:
-            pass
+    pairs = product_table.pairs_to_array(candidate_pairs)
+    brands = product_table.brands
+    shops = product_table.shops
+    mask = (brands[pairs[:, 0]] == brands[pairs[:, 1]]) & (shops[pairs[:, 0]] != shops[pairs[:, 1]])
+    output_set = product_table.array_to_pairs(pairs[mask])
     return output_set
 
 
@@ -196,19 +192,18 @@ def get_duplicates_found_pairwise(candidate_pairs, duplicates_no_triples_quadrup
 
     Args:
         candidate_pairs (set): Set of candidate duplicate pairs
-        duplicates_no_triples_quadruples (list): List of known duplicate pairs
+        duplicates_no_triples_quadruples (set): Set of known duplicate pairs as frozensets
 
     Returns:
         set: Set of confirmed duplicate pairs found among candidate pairs
     """
-    duplicates_found = set()
-    for cp in candidate_pairs:
-        if cp in duplicates_no_triples_quadruples:
-            duplicates_found.add(cp)
-    return duplicates_found
+    if not isinstance(duplicates_no_triples_quadruples, (set, frozenset)):
+        # other iterables of pairs are hashed into a set first, so that every membership check is O(1)
+        duplicates_no_triples_quadruples = {frozenset(x) for x in duplicates_no_triples_quadruples}
+    return {cp for cp in candidate_pairs if cp in duplicates_no_triples_quadruples}
 
 
-def get_total_possible_comparisions(data):
+def get_total_possible_comparisions(data, product_table=None):
     """
     Calculate total possible comparisons between products.
     
@@ -216,15 +211,21 @@ def get_total_possible_comparisions(data):
 
     Args:
         data (dict): Product data dictionary
+        product_table (ProductTable, optional): Columnar view on data. Created from data if not given.
 
     Returns:
         int: Total number of possible comparisons
     """
-    count = 0
-    for index, product in data.items():
-        for index_2, product_2 in data.items():
-            if index != index_2 and product["shop"] != product_2["shop"] and product["brand"] == product_2["brand"]:
-                count += 1
+    product_table = ProductTable.from_data(data) if product_table is None else product_table
+    if len(product_table) == 0:
+        return 0
+    if product_table.brands.min() < 0 or product_table.shops.min() < 0:
+        raise ValueError("brand and shop codes must be non-negative")
+    brands = product_table.brands.astype(np.int64)
+    brand_counts = np.bincount(brands)
+    brand_shop_counts = np.bincount(brands * (int(product_table.shops.max()) + 1) + product_table.shops)
+    # ordered pairs within a brand, minus the pairs that come from the same shop
+    count = int((brand_counts**2).sum() - (brand_shop_counts**2).sum())
     return count
 
 
@@ -257,25 +258,25 @@ def add_error_info_to_param_list(param_config_list):
     Returns:
         pandas.DataFrame: Parameter configurations with added error metrics
     """
-    list_storage = []
-    for element in param_config_list:
-        copy_el = copy.deepcopy(element)
-        copy_el["r1"] = element["params"][1][0]
-        copy_el["b1"] = element["params"][0][0]
-        copy_el["r2"] = element["params"][1][1]
-        copy_el["b2"] = element["params"][0][1]
-        error, fp, fn = compute_weighted_average_error(
-            threshold=element["threshold"], b_1=copy_el["b1"], b_2=copy_el["b2"], r_1=copy_el["r1"], r_2=copy_el["r2"]
-        )
-
-        copy_el["fn"] = fn
-        copy_el["fp"] = fp
-        copy_el["weighted_average_error"] = 0.5 * fn + 0.5 * fp
-        list_storage.append(copy_el)
-
-    df_params = pd.DataFrame(list_storage)
+    df_params = pd.DataFrame(param_config_list)
+    df_params["r1"] = [element["params"][1][0] for element in param_config_list]
+    df_params["b1"] = [element["params"][0][0] for element in param_config_list]
+    df_params["r2"] = [element["params"][1][1] for element in param_config_list]
+    df_params["b2"] = [element["params"][0][1] for element in param_config_list]
+    # evaluate the errors of all configurations in one batch
+    error, fp, fn = compute_weighted_average_errors(
+        thresholds=df_params["threshold"].to_numpy(),
+        b_1=df_params["b1"].to_numpy(),
+        b_2=df_params["b2"].to_numpy(),
+        r_1=df_params["r1"].to_numpy(),
+        r_2=df_params["r2"].to_numpy(),
+    )
+
+    df_params["fn"] = fn
+    df_params["fp"] = fp
+    df_params["weighted_average_error"] = error
     df_params["error_shift"] = df_params.groupby(["threshold", "num_perm"])["weighted_average_error"].shift()
-    df_params["percentage_change"] = df_params.apply(
-        lambda x: (x["error_shift"] - x["weighted_average_error"]) / x["weighted_average_error"] * 100, axis=1
+    df_params["percentage_change"] = (
+        (df_params["error_shift"] - df_params["weighted_average_error"]) / df_params["weighted_average_error"] * 100
     )
     return df_params
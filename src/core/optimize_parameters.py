@@ -10,20 +10,65 @@ Features include:
 - Performance metric optimization
 
 Mathematical Framework:
-- Uses integration-based probability calculations
+- Uses integration-based probability calculations (fixed Gauss-Legendre quadrature)
 - Implements both amplified and non-amplified schemes
 - Supports multiple optimization criteria
 
 """
 import numpy as np
-from scipy.integrate import quad as integrate
 import json
 import time
-from sympy.ntheory import factorint
-import itertools
-import math
+from concurrent.futures import ProcessPoolExecutor
 import pandas as pd
 
+# Composite Gauss-Legendre rule on each side of the threshold: the interval is split into
+# _QUADRATURE_PANELS panels with _QUADRATURE_ORDER nodes each. Even for the steepest s-curves
+# (r_1 close to num_perm) this matches adaptive quadrature up to ~1e-13.
+_QUADRATURE_PANELS = 32
+_QUADRATURE_ORDER = 16
+_nodes, _weights = np.polynomial.legendre.leggauss(_QUADRATURE_ORDER)
+_UNIT_GRID = ((np.arange(_QUADRATURE_PANELS)[:, None] + (_nodes + 1) / 2) / _QUADRATURE_PANELS).ravel()
+_QUADRATURE_WEIGHTS = np.tile(_weights / (2 * _QUADRATURE_PANELS), _QUADRATURE_PANELS)
+# Number of parameter combinations whose s-curves are evaluated together
+_BATCH_SIZE = 64
+
+
+def _candidate_probability(s, b_1, b_2, r_1, r_2):
+    """
+    Probability that a pair with similarity s becomes a candidate pair (the s-curve).
+
+    The parameters can be scalars or arrays, in which case they are broadcast against
+    the last axis of s.
+
+    Args:
+        s (numpy.ndarray): Similarities to evaluate the s-curve at
+        b_1 (int): First-level number of bands
+        b_2 (int): Second-level number of bands
+        r_1 (int): First-level rows per band
+        r_2 (int): Second-level rows per band
+
+    Returns:
+        numpy.ndarray: Candidate pair probability for every similarity in s
+    """
+    b_1, b_2, r_1, r_2 = (np.asarray(x, dtype=float) for x in (b_1, b_2, r_1, r_2))
+    return 1 - (1 - (1 - (1 - s**r_1) ** b_1) ** r_2) ** b_2
+
+
+def _integration_grid(lower, upper):
+    """
+    Place the quadrature nodes on [lower, upper]; array bounds give one grid per column.
+    """
+    lower = np.asarray(lower, dtype=float)
+    upper = np.asarray(upper, dtype=float)
+    return lower + np.multiply.outer(_UNIT_GRID, upper - lower)
+
+
+def _integrate_on_grid(values, lower, upper):
+    """
+    Integrate values sampled on the grid from _integration_grid.
+    """
+    return (np.asarray(upper, dtype=float) - np.asarray(lower, dtype=float)) * (_QUADRATURE_WEIGHTS @ values)
+
 
 def _false_positive_probability(threshold, b_1, b_2, r_1, r_2):
     """
@@ -42,8 +87,8 @@ def _false_positive_probability(threshold, b_1, b_2, r_1, r_2):
     Returns:
         float: False positive probability
     """
-    _probability = lambda s: 1 - (1 - (1 - (1 - s ** float(r_1)) ** float(b_1)) ** float(r_2)) ** float(b_2)
-    a, err = integrate(_probability, 0.0, threshold)
+    s = _integration_grid(0.0, threshold)
+    a = _integrate_on_grid(_candidate_probability(s, b_1, b_2, r_1, r_2), 0.0, threshold)
     return a
 
 
@@ -64,8 +109,8 @@ def _false_negative_probability(threshold, b_1, b_2, r_1, r_2):
     Returns:
         float: False negative probability
     """
-    _probability = lambda s: 1 - (1 - (1 - (1 - (1 - s ** float(r_1)) ** float(b_1)) ** float(r_2)) ** float(b_2))
-    a, err = integrate(_probability, threshold, 1.0)
+    s = _integration_grid(threshold, 1.0)
+    a = _integrate_on_grid(1 - _candidate_probability(s, b_1, b_2, r_1, r_2), threshold, 1.0)
     return a
 
 
@@ -85,32 +130,102 @@ def compute_weighted_average_error(threshold, b_1, b_2, r_1, r_2, false_positive
     Returns:
         tuple: (weighted error, false positive rate, false negative rate)
     """
-    fp = _false_positive_probability(threshold, b_1, b_2, r_1, r_2)
-    fn = _false_negative_probability(threshold, b_1, b_2, r_1, r_2)
+    fp, fn = _error_probabilities(threshold, b_1, b_2, r_1, r_2)
     error = fp * false_positive_weight + fn * false_negative_weight
     return error, fp, fn
 
-def _get_divisors(number):
+
+def compute_weighted_average_errors(
+    thresholds, b_1, b_2, r_1, r_2, false_positive_weight=0.5, false_negative_weight=0.5
+):
     """
-    Get all divisors of a number using prime factorization.
-    
-    This function uses sympy's factorint to get prime factors and
-    generates all possible divisors using combinations of these factors.
+    Compute weighted average of false positive and false negative errors for many configurations at once.
+
+    Args:
+        thresholds (numpy.ndarray): LSH similarity threshold per configuration
+        b_1 (numpy.ndarray): First-level number of bands per configuration
+        b_2 (numpy.ndarray): Second-level number of bands per configuration
+        r_1 (numpy.ndarray): First-level rows per band per configuration
+        r_2 (numpy.ndarray): Second-level rows per band per configuration
+        false_positive_weight (float, optional): Weight for false positives. Defaults to 0.5.
+        false_negative_weight (float, optional): Weight for false negatives. Defaults to 0.5.
+
+    Returns:
+        tuple: (weighted errors, false positive rates, false negative rates)
+    """
+    thresholds = np.asarray(thresholds, dtype=float)
+    fp, fn = _error_probabilities_batch(thresholds, *(np.asarray(x) for x in (b_1, b_2, r_1, r_2)))
+    error = fp * false_positive_weight + fn * false_negative_weight
+    return error, fp, fn
+
+
+def _error_probabilities(threshold, b_1, b_2, r_1, r_2):
+    """
+    Calculate both the false positive and false negative probability for given LSH parameters.
+
+    Args:
+        threshold (float): LSH similarity threshold
+        b_1 (int): First-level number of bands
+        b_2 (int): Second-level number of bands
+        r_1 (int): First-level rows per band
+        r_2 (int): Second-level rows per band
+
+    Returns:
+        tuple: (false positive probability, false negative probability)
+    """
+    fp = _false_positive_probability(threshold, b_1, b_2, r_1, r_2)
+    fn = _false_negative_probability(threshold, b_1, b_2, r_1, r_2)
+    return fp, fn
+
+
+def _error_probabilities_batch(threshold, b_1, b_2, r_1, r_2, chunk_size=_BATCH_SIZE):
+    """
+    Calculate the false positive and false negative probability for many LSH parameters at once.
+
+    The s-curves of all parameter combinations are evaluated on a shared grid, in chunks
+    of chunk_size combinations to cap the memory use.
 
     Args:
-        number (int): Number to find divisors for
+        threshold (float or numpy.ndarray): LSH similarity threshold, shared or per combination
+        b_1 (numpy.ndarray): First-level number of bands per combination
+        b_2 (numpy.ndarray): Second-level number of bands per combination
+        r_1 (numpy.ndarray): First-level rows per band per combination
+        r_2 (numpy.ndarray): Second-level rows per band per combination
+        chunk_size (int, optional): Number of combinations evaluated at once. Defaults to _BATCH_SIZE.
 
     Returns:
-        set: Set of all divisors
+        tuple: (false positive probabilities, false negative probabilities)
     """
-    factors = factorint(number)
-    list_factors = [key for key, value in factors.items() for i in range(1, value + 1)]
-    return_set = {1, number}
-    for i in range(len(list_factors)):
-        combis = itertools.combinations(list_factors, i)
-        for com in combis:
-            return_set.add(math.prod(com))
-    return return_set
+    fp = np.empty(len(b_1))
+    fn = np.empty(len(b_1))
+    # one threshold per combination, so that every combination gets its own grid column
+    thresholds = np.broadcast_to(threshold, b_1.shape)
+    for start in range(0, len(b_1), chunk_size):
+        chunk = slice(start, start + chunk_size)
+        params = (b_1[chunk], b_2[chunk], r_1[chunk], r_2[chunk])
+        fp[chunk] = _false_positive_probability(thresholds[chunk], *params)
+        fn[chunk] = _false_negative_probability(thresholds[chunk], *params)
+    return fp, fn
+
+
+def _get_divisors_up_to(number):
+    """
+    Get the divisors of all numbers up to and including the given number.
+
+    Instead of factorizing each number separately, every divisor is added to all of
+    its multiples in a single sieve-like pass, which takes O(n log n) operations.
+
+    Args:
+        number (int): Largest number to find divisors for
+
+    Returns:
+        list: List where element i holds the divisors of i in ascending order
+    """
+    divisors = [[] for _ in range(number + 1)]
+    for divisor in range(1, number + 1):
+        for multiple in range(divisor, number + 1, divisor):
+            divisors[multiple].append(divisor)
+    return divisors
 
 def optimal_param(threshold, num_perm, false_positive_weight, false_negative_weight, amplified, minimum_r1=1):
     """
@@ -131,29 +246,28 @@ def optimal_param(threshold, num_perm, false_positive_weight, false_negative_wei
         tuple: ((b1, b2), (r1, r2)) optimal parameters and minimum error
     """
     start_time = time.time()
-    min_error = float("inf")
-    opt = ((), ())
-    # all_outcomes = []
-    count = 0
+    # enumerate all parameter combinations first, so that they can be evaluated in batches
+    candidates = []
+    divisors = _get_divisors_up_to(num_perm)
     for r_1 in range(minimum_r1, num_perm + 1):
         max_b_0 = int(num_perm / r_1)
-        # min_error_b_0 = {}
         for b_0 in range(max_b_0, 0, -1):
-            b_1_options = _get_divisors(b_0) if amplified else {b_0}
+            b_1_options = divisors[b_0] if amplified else (b_0,)
             for b_1 in b_1_options:
                 n_2 = int(b_0 / b_1)
-                b_2_options = _get_divisors(n_2) if amplified else {1}
+                b_2_options = divisors[n_2] if amplified else (1,)
                 for b_2 in b_2_options:
-                    count += 1
                     r_2 = int(n_2 / b_2)
-                    fp = _false_positive_probability(threshold, b_1, b_2, r_1, r_2)
-                    fn = _false_negative_probability(threshold, b_1, b_2, r_1, r_2)
-                    error = fp * false_positive_weight + fn * false_negative_weight
-                    if error < min_error:
-                        min_error = error
-                        b = (b_1, b_2)
-                        r = (r_1, r_2)
-                        opt = (b, r)
+                    candidates.append((b_1, b_2, r_1, r_2))
+    b_1s, b_2s, r_1s, r_2s = np.array(candidates).T
+    fp, fn = _error_probabilities_batch(threshold, b_1s, b_2s, r_1s, r_2s)
+    errors = fp * false_positive_weight + fn * false_negative_weight
+    # argmin returns the first minimum, like the strict comparison in a sequential search
+    best = int(np.argmin(errors))
+    min_error = float(errors[best])
+    b = (int(b_1s[best]), int(b_2s[best]))
+    r = (int(r_1s[best]), int(r_2s[best]))
+    opt = (b, r)
     print(f"optimal_parameters: {opt}")
     print(f"evaluation took {time.time() - start_time} seconds")
     print(f"threshold estimated: {threshold_comp(r[0],b[0])}")
@@ -180,6 +294,28 @@ def threshold_comp(r, b):
         return 0
 
 
+def _optimize_config(config):
+    """
+    Find the optimal LSH parameters for a single configuration.
+
+    Module-level so that it can be sent to the worker processes.
+
+    Args:
+        config (dict): Configuration with threshold, num_perm and amplified
+
+    Returns:
+        tuple: Optimal (b, r) parameters
+    """
+    params, error = optimal_param(
+        threshold=config["threshold"],
+        num_perm=config["num_perm"],
+        false_positive_weight=0.5,
+        false_negative_weight=0.5,
+        amplified=config["amplified"],
+    )
+    return params
+
+
 if __name__ == "__main__":
     thresholds = list(np.arange(start=0.05, stop=1, step=0.05))
     num_perms = [16, 32, 64, 128, 256, 512, 1024]
@@ -200,6 +336,7 @@ if __name__ == "__main__":
 
     print(f"num configs: {len(list_configurations)}")
 
+    missing_indices = []
     for index, config in enumerate(list_configurations):
         # search in existing config
         params = next(
@@ -217,19 +354,17 @@ if __name__ == "__main__":
         print(config)
         print(params)
         if params == "not_found":
+            missing_indices.append(index)
+        config["params"] = params
 
-            # optimize parmameters
-            params, error = optimal_param(
-                threshold=config["threshold"],
-                num_perm=config["num_perm"],
-                false_positive_weight=0.5,
-                false_negative_weight=0.5,
-                amplified=config["amplified"],
-            )
+    # optimize parmameters, the configurations are independent so they are searched in parallel
+    with ProcessPoolExecutor() as executor:
+        missing_configs = [list_configurations[index] for index in missing_indices]
+        for index, params in zip(missing_indices, executor.map(_optimize_config, missing_configs)):
+            list_configurations[index]["params"] = params
 
-        config["params"] = params
+    for config in list_configurations:
         config["threshold"] = round(config["threshold"], 2)
-        list_configurations[index] = config
         print(config)
 
     with open("./results/parameter_config.json", "w") as file_:
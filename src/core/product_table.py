@@ -0,0 +1,131 @@
+"""
+Product Table Module
+
+This module provides a columnar (structure of arrays) view on the product data.
+Instead of looking up fields in a dictionary per product, the fields that are
+compared between products are stored as integer code arrays indexed by a dense
+product index. This allows candidate pairs to be evaluated with vectorized
+numpy operations.
+
+Classes:
+    ProductTable: Columnar store of the product fields used in the LSH evaluation
+
+"""
+from dataclasses import dataclass, field
+import numpy as np
+import pandas as pd
+
+
+def _factorize(values):
+    """
+    Encode a sequence of values as integer codes.
+
+    Args:
+        values (list): Values to encode
+
+    Returns:
+        numpy.ndarray: int32 code per value, equal values share the same code
+    """
+    # missing values get a code of their own instead of -1, so that None matches None as with ==
+    codes, _ = pd.factorize(pd.Series(values, dtype=object), use_na_sentinel=False)
+    # NaN is not equal to itself, so every NaN gets a unique code (pandas groups them with None)
+    nan_positions = [position for position, value in enumerate(values) if isinstance(value, float) and value != value]
+    if nan_positions:
+        codes[nan_positions] = codes.max() + 1 + np.arange(len(nan_positions))
+    return codes.astype(np.int32)
+
+
+@dataclass
+class ProductTable:
+    """
+    Columnar store of the product data, indexed by a dense product index.
+
+    Args:
+        keys (list): Product keys (IDs) in the order of the data
+        model_ids (numpy.ndarray): Factorized modelID per product
+        brands (numpy.ndarray): Factorized brand per product
+        shops (numpy.ndarray): Factorized shop per product
+
+    Attributes:
+        key_to_index: Mapping of product keys to their index in the table
+    """
+
+    keys: list
+    model_ids: np.ndarray
+    brands: np.ndarray
+    shops: np.ndarray
+    key_to_index: dict = field(init=False, repr=False)
+
+    def __post_init__(self):
+        self.key_to_index = {key: index for index, key in enumerate(self.keys)}
+
+    @classmethod
+    def from_data(cls, data):
+        """
+        Create a product table from a dictionary of products.
+
+        Args:
+            data (dict): Dictionary of products indexed by ID
+
+        Returns:
+            ProductTable: Columnar representation of the products
+        """
+        products = list(data.values())
+        return cls(
+            keys=list(data),
+            model_ids=_factorize([product["modelID"] for product in products]),
+            brands=_factorize([product["brand"] for product in products]),
+            shops=_factorize([product["shop"] for product in products]),
+        )
+
+    def __len__(self):
+        return len(self.keys)
+
+    def take(self, indices):
+        """
+        Create a product table holding only the products at the given indices.
+
+        The codes are not renumbered, so they stay comparable with the codes in this table.
+
+        Args:
+            indices (numpy.ndarray): Indices of the products to keep, in the order to keep them
+
+        Returns:
+            ProductTable: Product table with the selected products
+        """
+        indices = np.asarray(indices, dtype=np.int64)
+        return ProductTable(
+            keys=[self.keys[index] for index in indices.tolist()],
+            model_ids=self.model_ids[indices],
+            brands=self.brands[indices],
+            shops=self.shops[indices],
+        )
+
+    def pairs_to_array(self, candidate_pairs):
+        """
+        Convert a set of candidate pairs to an (N, 2) array of product indices.
+
+        Args:
+            candidate_pairs (set): Set of candidate pairs (frozensets of product keys)
+
+        Returns:
+            numpy.ndarray: Array with one row of two product indices per candidate pair
+        """
+        key_to_index = self.key_to_index
+        pairs = np.fromiter(
+            (key_to_index[key] for cp in candidate_pairs for key in cp), dtype=np.int64, count=2 * len(candidate_pairs)
+        )
+        return pairs.reshape(-1, 2)
+
+    def array_to_pairs(self, pairs):
+        """
+        Convert an (N, 2) array of product indices back to a set of candidate pairs.
+
+        Args:
+            pairs (numpy.ndarray): Array with one row of two product indices per candidate pair
+
+        Returns:
+            set: Set of candidate pairs (frozensets of product keys)
+        """
+        keys = self.keys
+        return {frozenset((keys[i], keys[j])) for i, j in pairs.tolist()}
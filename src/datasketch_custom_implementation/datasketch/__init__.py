@@ -1,19 +1,43 @@
-from .hyperloglog import HyperLogLog, HyperLogLogPlusPlus
-from .minhash import MinHash
-from .b_bit_minhash import bBitMinHash
-from .lsh import MinHashLSH
-from .weighted_minhash import WeightedMinHash, WeightedMinHashGenerator
-from .lshforest import MinHashLSHForest
-from .lshensemble import MinHashLSHEnsemble
-from .lean_minhash import LeanMinHash
-from .hashfunc import sha1_hash32
-from .lsh_amplified import MinHashLSHAmplified
-from .fill_sketch import FillSketch
-from .mixed_tab import MixedTabulation
-
-# Alias
-WeightedMinHashLSH = MinHashLSH
-WeightedMinHashLSHForest = MinHashLSHForest
+import importlib
+
+# The public classes are imported lazily on first access (PEP 562), so that using e.g.
+# only MinHash does not load the mixed tabulation extension.
+_LAZY_IMPORTS = {
+    "HyperLogLog": ("hyperloglog", "HyperLogLog"),
+    "HyperLogLogPlusPlus": ("hyperloglog", "HyperLogLogPlusPlus"),
+    "MinHash": ("minhash", "MinHash"),
+    "bBitMinHash": ("b_bit_minhash", "bBitMinHash"),
+    "MinHashLSH": ("lsh", "MinHashLSH"),
+    "WeightedMinHash": ("weighted_minhash", "WeightedMinHash"),
+    "WeightedMinHashGenerator": ("weighted_minhash", "WeightedMinHashGenerator"),
+    "MinHashLSHForest": ("lshforest", "MinHashLSHForest"),
+    "MinHashLSHEnsemble": ("lshensemble", "MinHashLSHEnsemble"),
+    "LeanMinHash": ("lean_minhash", "LeanMinHash"),
+    "sha1_hash32": ("hashfunc", "sha1_hash32"),
+    "MinHashLSHAmplified": ("lsh_amplified", "MinHashLSHAmplified"),
+    "FillSketch": ("fill_sketch", "FillSketch"),
+    "MixedTabulation": ("mixed_tab", "MixedTabulation"),
+    # Alias
+    "WeightedMinHashLSH": ("lsh", "MinHashLSH"),
+    "WeightedMinHashLSHForest": ("lshforest", "MinHashLSHForest"),
+}
+
+__all__ = list(_LAZY_IMPORTS) + ["__version__"]
+
+
+def __getattr__(name):
+    if name not in _LAZY_IMPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    module_name, attribute = _LAZY_IMPORTS[name]
+    value = getattr(importlib.import_module("." + module_name, __name__), attribute)
+    # cache the attribute, so later accesses do not go through __getattr__
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_IMPORTS))
+
 
 # Version
 from .version import __version__
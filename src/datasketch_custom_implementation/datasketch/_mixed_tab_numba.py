@@ -0,0 +1,38 @@
+"""
+Numba kernel for mixed tabulation hashing of many keys at once.
+
+Numba is an optional dependency. If it is not installed, ``mixtab_batch`` is None
+and MixedTabulation falls back to the loop in the C++ extension.
+"""
+
+try:
+    from numba import njit, prange, uint64
+except ImportError:
+    njit = None
+
+if njit is not None:
+
+    @njit(cache=True, parallel=True, nogil=True, boundscheck=False)
+    def mixtab_batch(char_tables, derived_tables, xs, i, out):
+        """
+        Hash the keys built from xs and i with the given tabulation tables.
+
+        Args:
+            char_tables (numpy.ndarray): (characters, 256) uint64 character tables
+            derived_tables (numpy.ndarray): (derived characters, 256) uint32 derived character tables
+            xs (numpy.ndarray): uint32 values to hash
+            i (numpy.ndarray): uint32 indices for the hash function, one per value
+            out (numpy.ndarray): uint64 array the hash values are written to
+        """
+        for n in prange(xs.shape[0]):
+            key = (uint64(xs[n]) << uint64(32)) | uint64(i[n])
+            h = uint64(0)
+            for position in range(char_tables.shape[0]):
+                h ^= char_tables[position, (key >> uint64(8 * position)) & uint64(0xFF)]
+            derived = h >> uint64(32)
+            for position in range(derived_tables.shape[0]):
+                h ^= uint64(derived_tables[position, (derived >> uint64(8 * position)) & uint64(0xFF)])
+            out[n] = h & uint64(0xFFFFFFFF)
+
+else:
+    mixtab_batch = None
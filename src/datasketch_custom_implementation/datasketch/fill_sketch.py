@@ -9,10 +9,6 @@ The key features include:
 - Support for both standard and mixed tabulation-based hashing
 """
 
-import os
-
-os.add_dll_directory("C:\\msys64\\mingw64\\bin")
-from . import pyMixedTabulation
 import random
 import time
 from .hashfunc import sha1_hash32
@@ -37,6 +33,8 @@ class FillSketch(object):
         hashfunc (callable, optional): Hash function to use. Defaults to SHA1.
         mixedtab_objects (list, optional): Pre-initialized mixed tabulation objects.
         mixed_tab (bool, optional): Whether to use mixed tabulation hashing.
+        hash_cache (dict, optional): Hash outputs of elements shared between sketches that
+            use the same seeds and sketch length. Missing elements are hashed and added.
 
     Attributes:
         input: The input set
@@ -47,7 +45,14 @@ class FillSketch(object):
         hashvalues: The final sketch values
     """
     def __init__(
-        self, input, sketch_length=128, seeds=[1, 2], hashfunc=sha1_hash32, mixedtab_objects=None, mixed_tab=True
+        self,
+        input,
+        sketch_length=128,
+        seeds=[1, 2],
+        hashfunc=sha1_hash32,
+        mixedtab_objects=None,
+        mixed_tab=True,
+        hash_cache=None,
     ):
         if sketch_length > _hash_range:
             # Because 1) we don't want the size to be too large, and
@@ -74,7 +79,13 @@ class FillSketch(object):
             raise ValueError("The hashfunc must be a callable.")
         self.hashfunc = hashfunc
 
-        self.hash_outputs = {x: self.get_hash_values(x) for x in self.input}
+        if hash_cache is None:
+            self.hash_outputs = {x: self.get_hash_values(x) for x in self.input}
+        else:
+            for x in self.input:
+                if x not in hash_cache:
+                    hash_cache[x] = self.get_hash_values(x)
+            self.hash_outputs = {x: hash_cache[x] for x in self.input}
 
         # generate hash
         self.hashvalues = self._generate_fill_sketch(input_set=input, sketch_length=sketch_length)
@@ -109,12 +120,11 @@ class FillSketch(object):
         """
         hash_value = self.hashfunc(input.encode("utf-8"))
         if self.mixed_tab:
-            bins = np.empty(shape=self.sketch_length)
-            for i in range(self.sketch_length):
-                bins[i] = int(self.mixedtab_object[0].get_hash(x=hash_value, i=i) % self.sketch_length)
-            values = np.empty(shape=self.sketch_length * 2)
-            for i in range(self.sketch_length * 2):
-                values[i] = self.mixedtab_object[1].get_hash(x=hash_value, i=i) / (2**32 - 1)
+            # hash all indices of the input in one batch per mixed tabulation object
+            indices = np.arange(self.sketch_length * 2)
+            bin_hashes = self.mixedtab_object[0].get_hash_many(xs=hash_value, i=indices[: self.sketch_length])
+            bins = (bin_hashes % self.sketch_length).astype(np.float64)
+            values = self.mixedtab_object[1].get_hash_many(xs=hash_value, i=indices) / (2**32 - 1)
         else:
             a, b = self._init_permutations(self.sketch_length)
             intermediate = (a * hash_value + b) % _mersenne_prime
@@ -162,6 +172,32 @@ class FillSketch(object):
             type(self) is type(other) and self.seed == other.seed and np.array_equal(self.hashvalues, other.hashvalues)
         )
 
+    @classmethod
+    def bulk(cls, inputs, sketch_length=128, seeds=[1, 2], **fill_sketch_kwargs):
+        """
+        Compute FillSketches in bulk.
+
+        The mixed tabulation objects are initialized once and the hash outputs of every
+        element are computed only once, however many of the input sets contain it.
+
+        Args:
+            inputs (Iterable): An Iterable of sets, each set is sketched in to one FillSketch.
+            sketch_length (int, optional): Length of the sketches. Defaults to 128.
+            seeds (list, optional): Seeds for hash functions. Defaults to [1, 2].
+            fill_sketch_kwargs: Keyword arguments used to initialize FillSketch,
+                will be used for all sketches.
+
+        Returns:
+            List[FillSketch]: A list of computed FillSketches.
+        """
+        if fill_sketch_kwargs.get("mixed_tab", True) and not fill_sketch_kwargs.get("mixedtab_objects"):
+            fill_sketch_kwargs["mixedtab_objects"] = [MixedTabulation(seed=seeds[0]), MixedTabulation(seed=seeds[1])]
+        hash_cache = {}
+        return [
+            cls(input=input, sketch_length=sketch_length, seeds=seeds, hash_cache=hash_cache, **fill_sketch_kwargs)
+            for input in inputs
+        ]
+
     # @classmethod
     # def create_mixedtab_objects(cls, sketch_length, seed_gen):
     #     mixedtab_objects = []
@@ -6,12 +6,54 @@ Mixed tabulation provides fast hashing while maintaining good theoretical
 properties for LSH applications.
 """
 
+import functools
 import os
+import sys
 
-os.add_dll_directory("C:\\msys64\\mingw64\\bin")
+import numpy as np
+
+# The extension is built with MinGW on Windows, so its runtime DLLs have to be on the search path.
+# MIXEDTAB_DLL_DIR overrides the default MSYS2 location.
+if sys.platform == "win32":
+    _dll_directory = os.environ.get("MIXEDTAB_DLL_DIR", "C:\\msys64\\mingw64\\bin")
+    if os.path.isdir(_dll_directory):
+        os.add_dll_directory(_dll_directory)
 from . import pyMixedTabulation
 
 
+@functools.lru_cache(maxsize=128)
+def _get_py_mix_tab(seed):
+    """
+    Get the tabulation tables for a seed, filling them only once per seed.
+
+    The tables are read-only after construction, so one PyMixTab can be shared by
+    all MixedTabulation objects with the same seed.
+
+    Args:
+        seed (int): Seed for random number generation
+
+    Returns:
+        pyMixedTabulation.PyMixTab: The underlying mixed tabulation implementation
+    """
+    return pyMixedTabulation.PyMixTab(seed)
+
+
+@functools.lru_cache(maxsize=None)
+def _get_mixtab_batch():
+    """
+    Get the Numba kernel for batched hashing, importing Numba only on first use.
+
+    Importing Numba takes about half a second, which would otherwise be paid by every
+    import of this module, also when the kernel is never used.
+
+    Returns:
+        callable: The compiled kernel, or None if Numba is not installed
+    """
+    from ._mixed_tab_numba import mixtab_batch
+
+    return mixtab_batch
+
+
 class MixedTabulation(object):
     """
     Mixed tabulation hashing implementation.
@@ -19,11 +61,30 @@ class MixedTabulation(object):
     Args:
         seed (int, optional): Seed for random number generation. Defaults to 1.
         
+    The tabulation tables are read-only after construction, so a MixedTabulation object can be
+    shared between threads. get_hash_many and get_hash_batch release the GIL while hashing.
+
     Attributes:
-        mixed_tab_object: The underlying mixed tabulation implementation
+        seed: Seed the tabulation tables are generated from
+        mixed_tab_object: The underlying mixed tabulation implementation, must not be modified
+        char_tables: Read-only (characters, 256) uint64 view of the character tables
+        derived_tables: Read-only (derived characters, 256) uint32 view of the derived character tables
     """
+
+    __slots__ = ("seed", "mixed_tab_object", "char_tables", "derived_tables")
+
     def __init__(self, seed=1):
-        self.mixed_tab_object = pyMixedTabulation.PyMixTab(seed)
+        self.seed = seed
+        self.mixed_tab_object = _get_py_mix_tab(seed)
+        char_tables, derived_tables = self.mixed_tab_object.tables()
+        # one row per character position, so that a lookup for position j is a gather from row j
+        # PyMixTab.tables() returns read-only views, so the transposed views are read-only as well
+        self.char_tables = char_tables.T
+        self.derived_tables = derived_tables.T
+
+    def __reduce__(self):
+        # the tables are a deterministic function of the seed, so only the seed is pickled
+        return (MixedTabulation, (self.seed,))
 
     def _create_64_bit_from_x_and_i(self, x, i):
         """
@@ -36,34 +97,104 @@ class MixedTabulation(object):
         Returns:
             int: Combined 64-bit value
         """
-        bin_x = bin(x)
-        bin_i = bin(i)
+        return ((x & 0xFFFFFFFF) << 32) | (i & 0xFFFFFFFF)
 
-        bin_x_part = bin_x.split("b")[1]
-        zeros_to_add_x = 32 - len(bin_x_part)
-        zeros_x = zeros_to_add_x * "0"
-        bin_x_32_bit = zeros_x + bin_x_part
-
-        bin_i_part = bin_i.split("b")[1]
-        zeros_to_add_i = 32 - len(bin_i_part)
-        zeros_i = zeros_to_add_i * "0"
-        bin_i_32_bit = zeros_i + bin_i_part
-        total_64_bit = "0b" + bin_x_32_bit + bin_i_32_bit
-
-        total = int(total_64_bit, 2)
-        return total
-
-    def get_hash(self, x, i):
+    def get_hash(self, x, i=None):
         """
         Get hash value using mixed tabulation.
         
         Args:
-            x (int): Value to hash (must be 32-bit)
-            i (int): Index for hash function (must be 32-bit)
+            x (int or bytes): Value to hash (must be 32-bit), or the complete 64-bit key
+                as 8 little-endian bytes (bytes, bytearray or contiguous memoryview)
+            i (int, optional): Index for hash function (must be 32-bit), only used when x is an int
             
         Returns:
             int: Hash value
         """
+        if isinstance(x, (bytes, bytearray, memoryview)):
+            # the key is passed to the extension as is, without packing it into a Python int
+            return self.mixed_tab_object.getHashBytes(x)
+        if i is None:
+            raise TypeError("i is required for integer keys")
         key_64_bit = self._create_64_bit_from_x_and_i(x, i)
         hash = self.mixed_tab_object.getHash(key_64_bit)
         return hash
+
+    def get_hash_many(self, xs, i):
+        """
+        Get hash values of many keys using mixed tabulation, in a single call to the extension.
+
+        Args:
+            xs (int or numpy.ndarray): Values to hash (must be 32-bit)
+            i (int or numpy.ndarray): Indices for hash function (must be 32-bit), broadcast against xs
+
+        Returns:
+            numpy.ndarray: uint64 array of hash values, with the broadcast shape of xs and i
+        """
+        mask = np.uint64(0xFFFFFFFF)
+        xs = np.asarray(xs).astype(np.uint64) & mask
+        i = np.asarray(i).astype(np.uint64) & mask
+        keys_64_bit = (xs << np.uint64(32)) | i
+        hashes = self.mixed_tab_object.getHashMany(keys_64_bit.ravel())
+        return hashes.reshape(keys_64_bit.shape)
+
+    def get_hash_batch(self, xs, i):
+        """
+        Get hash values of many keys using mixed tabulation, with the Numba kernel if available.
+
+        Args:
+            xs (int or numpy.ndarray): Values to hash (must be 32-bit)
+            i (int or numpy.ndarray): Indices for hash function (must be 32-bit), broadcast against xs
+
+        Returns:
+            numpy.ndarray: uint64 array of hash values, with the broadcast shape of xs and i
+        """
+        mixtab_batch = _get_mixtab_batch()
+        if mixtab_batch is None:
+            return self.get_hash_many(xs, i)
+        xs, i = np.broadcast_arrays(np.asarray(xs).astype(np.uint32), np.asarray(i).astype(np.uint32))
+        hashes = np.empty(xs.size, dtype=np.uint64)
+        mixtab_batch(self.char_tables, self.derived_tables, xs.ravel(), i.ravel(), hashes)
+        return hashes.reshape(xs.shape)
+
+    def hash_batch_into(self, keys_64_bit, out):
+        """
+        Hash 64-bit keys into a preallocated array, so a buffer can be reused between batches.
+
+        Args:
+            keys_64_bit (numpy.ndarray): Keys to hash
+            out (numpy.ndarray): C-contiguous uint64 array with as many elements as keys_64_bit
+
+        Returns:
+            numpy.ndarray: out, filled with the hash values
+        """
+        if out.dtype != np.uint64:
+            raise TypeError(f"out must have dtype uint64, got {out.dtype}")
+        if not out.flags.c_contiguous:
+            # a reshaped copy would be filled instead of out itself
+            raise ValueError("out must be C-contiguous")
+        self.mixed_tab_object.getHashManyInto(np.asarray(keys_64_bit, dtype=np.uint64).ravel(), out.reshape(-1))
+        return out
+
+    def hash_array(self, keys_64_bit):
+        """
+        Get hash values of 64-bit keys with numpy gathers from the tabulation tables.
+
+        Gives the same hash values as the extension, without calling it per key.
+
+        Args:
+            keys_64_bit (numpy.ndarray): Keys to hash
+
+        Returns:
+            numpy.ndarray: uint64 array of hash values, with the shape of keys_64_bit
+        """
+        keys_64_bit = np.asarray(keys_64_bit, dtype=np.uint64)
+        # byte planes of the keys, least significant byte first
+        characters = keys_64_bit.ravel().astype("<u8").view(np.uint8).reshape(-1, 8)
+        hashes = np.zeros(len(characters), dtype=np.uint64)
+        for position, table in enumerate(self.char_tables):
+            hashes ^= table[characters[:, position]]
+        derived_characters = (hashes >> np.uint64(32)).astype("<u4").view(np.uint8).reshape(-1, 4)
+        for position, table in enumerate(self.derived_tables):
+            hashes ^= table[derived_characters[:, position]]
+        return (hashes & np.uint64(0xFFFFFFFF)).reshape(keys_64_bit.shape)
@@ -0,0 +1,29 @@
+import unittest
+
+import numpy as np
+
+from src.datasketch_custom_implementation.datasketch.mixed_tab import MixedTabulation
+
+
+class TestMixedTabulationBytes(unittest.TestCase):
+    def setUp(self):
+        self.mixed_tab = MixedTabulation(seed=1)
+
+    def test_bytes_match_integer_key(self):
+        x, i = 123456, 7
+        key = ((x << 32) | i).to_bytes(8, "little")
+        self.assertEqual(self.mixed_tab.get_hash(key), self.mixed_tab.get_hash(x, i))
+        self.assertEqual(self.mixed_tab.get_hash(memoryview(key)), self.mixed_tab.get_hash(x, i))
+
+    def test_strided_memoryview_is_rejected(self):
+        for strided in (memoryview(bytes(range(16)))[::2], memoryview(np.arange(16, dtype=np.uint8)[::2])):
+            with self.assertRaises(ValueError):
+                self.mixed_tab.get_hash(strided)
+
+    def test_wrong_length_is_rejected(self):
+        with self.assertRaises(ValueError):
+            self.mixed_tab.get_hash(bytes(7))
+
+
+if __name__ == "__main__":
+    unittest.main()